@@ -0,0 +1,49 @@
+from typing import Dict, Optional
+
+from .._properties import DYNAMICS_PROPERTIES, PHYSICS_PROPERTIES
+
+# mapping from standard name to the properties entry for that variable,
+# for variables whose properties are known at import time (tracers are not)
+properties_by_std_name = {
+    entry["name"]: entry for entry in DYNAMICS_PROPERTIES + PHYSICS_PROPERTIES
+}
+
+
+def _restart_name(properties: dict) -> str:
+    return properties.get("restart_name", properties["fortran_name"])
+
+
+# static portion of the restart-name mapping, computed once at import; tracer
+# names are only known at runtime and are overlaid per call. Entries with a
+# fortran_subname are components of a container variable and share their
+# fortran_name with their siblings, so they only enter the mapping through an
+# explicit restart_name, which disambiguates which component the restart file
+# holds.
+_BASE_RESTART_STANDARD_NAMES = {
+    _restart_name(properties): properties["name"]
+    for properties in DYNAMICS_PROPERTIES + PHYSICS_PROPERTIES
+    if "restart_name" in properties or "fortran_subname" not in properties
+}
+
+
+def get_restart_standard_names(
+    tracer_properties: Optional[dict] = None,
+) -> Dict[str, str]:
+    """Return a mapping from restart file variable names to standard names.
+
+    The mapping for the dynamics and physics variables is computed once at
+    import time; only the tracer entries are rebuilt per call.
+
+    Args:
+        tracer_properties (optional): tracer metadata as returned by
+            :py:func:`fv3gfs.wrapper.get_tracer_metadata`
+
+    Returns:
+        mapping from the short names used in Fortran restart files to the
+        standard names used in state dictionaries
+    """
+    return_dict = dict(_BASE_RESTART_STANDARD_NAMES)
+    if tracer_properties is not None:
+        for std_name, properties in tracer_properties.items():
+            return_dict[_restart_name(properties)] = std_name
+    return return_dict
@@ -1,13 +1,76 @@
-from typing import List
+import concurrent.futures
+import hashlib
+import importlib.util
+import io
+import os
+import pickle
+from typing import BinaryIO, Dict, Iterable, List, TextIO
+
+import cftime
+import fsspec
+import fsspec.spec
+import numpy as np
+import xarray as xr
+
 import pace.util
+from pace.util.constants import ROOT_RANK
+
+# soft import as in pace.util, so the loader can be imported (and the file
+# readers unit tested) without MPI; broadcast_state still requires it
+from pace.util.mpi import MPI
+
+from . import fortran_info
 from .. import _wrapper
 
+__all__ = ["open_restart"]
+
+RESTART_NAMES = ("fv_core.res", "fv_srf_wnd.res", "fv_tracer.res")
+RESTART_OPTIONAL_NAMES = ("sfc_data", "phy_data")  # not output for dycore-only runs
+COUPLER_RES_NAME = "coupler.res"
+
+# number of leading bytes hashed to identify restart files which share a grid,
+# enough to cover the netCDF header of the files the Fortran model writes
+HEADER_FINGERPRINT_BYTES = 4096
+
+_geo_coord_cache: Dict[bytes, Dict[str, xr.DataArray]] = {}
+
+# prefer the h5netcdf engine when it is installed: h5py releases the GIL
+# during reads, so the threaded per-file opens genuinely overlap
+_RESTART_ENGINE = "h5netcdf" if importlib.util.find_spec("h5netcdf") else None
+
+_HAVE_H5PY = importlib.util.find_spec("h5py") is not None
+
+# run xarray's backend discovery (an entry-point scan plus backend imports)
+# while the wrapper is being imported at model startup, so the first restart
+# open does not pay for it on the timed path
+try:
+    xr.backends.list_engines()
+except AttributeError:  # older xarray without the plugin registry
+    pass
+
+# signature at the start of every HDF5 (and therefore netCDF-4) file
+HDF5_MAGIC = b"\x89HDF\r\n\x1a\n"
+
+# restart file metadata is fixed and trusted, and apply_restart_metadata
+# re-applies units and dimension names from the variable properties, so the
+# (profile-dominating) CF decoding pass in xarray can be skipped entirely
+_OPEN_DATASET_KWARGS = dict(
+    engine=_RESTART_ENGINE,
+    decode_cf=False,
+    decode_times=False,
+    decode_coords=False,
+    mask_and_scale=False,
+    cache=False,
+    chunks=None,
+)
+
 
 def open_restart(
     dirname: str,
     communicator: pace.util.CubedSphereCommunicator,
     label: str = "",
     only_names: List[str] = None,
+    cache_geo_coords: bool = True,
 ) -> dict:
     """Load restart files output by the Fortran model into a state dictionary.
 
@@ -19,15 +82,441 @@ def open_restart(
         communicator: communication object for the cubed sphere
         label: prepended string on the restart files to load
         only_names (optional): list of standard names to load
+        cache_geo_coords: if True (default), coordinate variables are read once
+            per unique file header and re-used for restart files which share it
 
     Returns:
         state: model state dictionary
     """
     tracer_properties = _wrapper.get_tracer_metadata()
-    return pace.util.open_restart(
-        dirname,
-        communicator,
-        label=label,
-        only_names=only_names,
-        tracer_properties=tracer_properties,
+    tile_index = communicator.partitioner.tile_index(communicator.rank)
+    state = {}
+    if communicator.tile.rank == ROOT_RANK:
+
+        def load(filename):
+            with fsspec.open(filename, "rb") as file:
+                return load_partial_state_from_restart_file(
+                    _buffered(file),
+                    only_names=only_names,
+                    tracer_properties=tracer_properties,
+                    cache_geo_coords=cache_geo_coords,
+                )
+
+        # opening restart files is I/O-bound (particularly against remote
+        # storage), so overlap the per-file opens in a thread pool
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(RESTART_NAMES) + len(RESTART_OPTIONAL_NAMES)
+        ) as executor:
+            for partial_state in executor.map(
+                load, restart_filenames(dirname, tile_index, label)
+            ):
+                state.update(partial_state)
+        if only_names is None or "time" in only_names:
+            coupler_res_filename = os.path.join(
+                dirname, prepend_label(COUPLER_RES_NAME, label)
+            )
+            if _is_file(coupler_res_filename):
+                with fsspec.open(coupler_res_filename, "r") as f:
+                    state["time"] = get_current_date_from_coupler_res(f)
+    return broadcast_state(state, communicator)
+
+
+def restart_filenames(dirname: str, tile_index: int, label: str = "") -> List[str]:
+    """Return the restart filenames for one tile, skipping optional files
+    which do not exist."""
+    # join the directory, label and suffix once and fill in each name, rather
+    # than re-running os.path.join and string formatting per file
+    template = os.path.join(
+        dirname, prepend_label("{name}", label) + f".tile{tile_index + 1}.nc"
     )
+    # one directory listing answers every existence check, instead of one
+    # stat per optional file against (possibly remote) storage; compare
+    # basenames since fsspec listings may omit the protocol prefix
+    try:
+        existing = frozenset(
+            os.path.basename(path)
+            for path in _get_fs(dirname).ls(dirname, detail=False)
+        )
+    except FileNotFoundError:
+        existing = frozenset()
+    return_list = []
+    for name in RESTART_NAMES + RESTART_OPTIONAL_NAMES:
+        filename = template.format(name=name)
+        if (name in RESTART_NAMES) or os.path.basename(filename) in existing:
+            return_list.append(filename)
+    return return_list
+
+
+def _buffered(file: BinaryIO) -> BinaryIO:
+    """Wrap a raw binary file in a BufferedReader, so that the small header
+    probes made while opening (magic-byte sniffing by the netCDF engine, the
+    geo-coord fingerprint read) are served from a local buffer instead of
+    issuing tiny read requests to the underlying (possibly remote) file."""
+    if isinstance(file, io.BufferedReader):
+        return file
+    return io.BufferedReader(file, buffer_size=HEADER_FINGERPRINT_BYTES)
+
+
+def prepend_label(filename: str, label: str = "") -> str:
+    if len(label) > 0:
+        return f"{label}.{filename}"
+    else:
+        return filename
+
+
+def load_partial_state_from_restart_file(
+    file: BinaryIO,
+    only_names: Iterable[str] = None,
+    tracer_properties: dict = None,
+    cache_geo_coords: bool = True,
+) -> dict:
+    """Load the state defined in one restart file.
+
+    Args:
+        file: the restart netCDF file, opened for binary reading
+        only_names (optional): list of standard names to load
+        tracer_properties (optional): tracer metadata as returned by
+            :py:func:`fv3gfs.wrapper.get_tracer_metadata`
+        cache_geo_coords: if True (default), coordinate variables are read once
+            per unique file header and re-used for restart files which share it
+
+    Returns:
+        state: model state dictionary for the variables in the file
+    """
+    if only_names is not None:
+        # only_names may be any iterable; make membership tests O(1)
+        only_names = frozenset(only_names)
+    if _HAVE_H5PY and _is_hdf5(file):
+        state = _load_partial_state_h5py(file, only_names, tracer_properties)
+        if state is not None:
+            return state
+        file.seek(0)
+    ds = _open_restart_dataset(file, cache_geo_coords=cache_geo_coords)
+    if "Time" in ds.dims:
+        ds = ds.isel(Time=0).drop_vars("Time")
+    state = map_keys(
+        fortran_info.get_restart_standard_names(tracer_properties), dict(ds.data_vars),
+    )
+    # filter before applying metadata, so unwanted variables are discarded
+    # while still lazily-loaded instead of after being processed
+    if only_names is not None:
+        state = {name: value for name, value in state.items() if name in only_names}
+    # read all retained variables in one eager pass, rather than triggering
+    # one lazy read per variable during Quantity construction; at this point
+    # the variables still carry the file's own dimension names, which are
+    # guaranteed consistent within a single restart file
+    state = dict(xr.Dataset(state).load().data_vars)
+    state = apply_restart_metadata(state, tracer_properties)
+    return _quantities_from_data_arrays(state)
+
+
+_dims_intern: Dict[tuple, tuple] = {}
+
+
+def _quantities_from_data_arrays(state: dict) -> dict:
+    """Convert a dictionary of loaded DataArrays to quantities in one pass,
+    sharing a single dims tuple per distinct dimension signature rather than
+    re-deriving the metadata variable by variable.
+
+    Variables without a units attribute have no restart metadata (the files
+    themselves carry none) and are silently dropped, as the previous loader
+    did."""
+    new_state = {}
+    for name, da in state.items():
+        if "units" not in da.attrs:
+            continue
+        dims = _dims_intern.setdefault(tuple(da.dims), tuple(da.dims))
+        new_state[name] = pace.util.Quantity(
+            da.values, dims=dims, units=da.attrs["units"]
+        )
+    return new_state
+
+
+def _is_hdf5(file: BinaryIO) -> bool:
+    magic = file.read(len(HDF5_MAGIC))
+    file.seek(0)
+    return magic == HDF5_MAGIC
+
+
+def _load_partial_state_h5py(
+    file: BinaryIO, only_names: frozenset = None, tracer_properties: dict = None
+) -> dict:
+    """Read restart variables directly with h5py, bypassing xarray parsing.
+
+    Dimension names and units are taken from the variable properties rather
+    than the file, so none of the netCDF dimension-scale machinery is needed
+    on this path. Returns None when the file contains a data variable not
+    described by the properties, in which case the caller falls back to the
+    xarray-based reader.
+    """
+    import h5py
+
+    restart_standard_names = fortran_info.get_restart_standard_names(tracer_properties)
+    properties_by_std_name = fortran_info.properties_by_std_name
+    if tracer_properties is not None:
+        properties_by_std_name = dict(properties_by_std_name, **tracer_properties)
+    state = {}
+    with h5py.File(file, "r") as f:
+        for restart_name, dataset in f.items():
+            if restart_name not in restart_standard_names:
+                if dataset.attrs.get("CLASS") == b"DIMENSION_SCALE":
+                    continue  # a coordinate variable, never part of the state
+                return None
+            std_name = restart_standard_names[restart_name]
+            if only_names is not None and std_name not in only_names:
+                continue
+            properties = properties_by_std_name.get(std_name)
+            if properties is None:
+                return None
+            dims = properties["dims"]
+            if dataset.ndim == len(dims) + 1:
+                data = dataset[0]  # drop the leading size-1 Time dimension
+            elif dataset.ndim == len(dims):
+                data = dataset[...]
+            else:
+                return None
+            state[std_name] = pace.util.Quantity(
+                data, dims=dims, units=properties["units"]
+            )
+    return state
+
+
+def _open_restart_dataset(file: BinaryIO, cache_geo_coords: bool = True) -> xr.Dataset:
+    """Open a restart file as a dataset, re-using cached coordinate variables
+    from a previously-opened file with an identical header if possible.
+
+    The cache is keyed on a fingerprint of the file header, so it is only
+    valid for trusted files whose coordinates are described by their header,
+    as is the case for restart files written by the Fortran model.
+    """
+    if not cache_geo_coords:
+        return _set_dim_coords(xr.open_dataset(file, **_OPEN_DATASET_KWARGS))
+    fingerprint = _geo_coord_fingerprint(file)
+    cached_coords = _geo_coord_cache.get(fingerprint)
+    if cached_coords is None:
+        ds = _set_dim_coords(xr.open_dataset(file, **_OPEN_DATASET_KWARGS))
+        _geo_coord_cache[fingerprint] = dict(ds.coords)
+        return ds
+    else:
+        ds = xr.open_dataset(
+            file, drop_variables=list(cached_coords.keys()), **_OPEN_DATASET_KWARGS
+        )
+        return ds.assign_coords(cached_coords)
+
+
+def _set_dim_coords(ds: xr.Dataset) -> xr.Dataset:
+    """Promote dimension variables to coordinates, which is not done
+    automatically when coordinate decoding is disabled."""
+    return ds.set_coords([name for name in ds.variables if name in ds.dims])
+
+
+def _geo_coord_fingerprint(file: BinaryIO) -> bytes:
+    """Return a cheap fingerprint (file size plus a hash of the leading bytes)
+    identifying restart files which share coordinate metadata."""
+    header = file.read(HEADER_FINGERPRINT_BYTES)
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return hashlib.md5(header + size.to_bytes(8, "little")).digest()
+
+
+def map_keys(key_mapping: Dict[str, str], old_dict: dict) -> dict:
+    """Return a new dictionary with the keys of old_dict renamed according to
+    key_mapping, leaving unmapped keys unchanged."""
+    new_dict = {}
+    for old_key, new_key in key_mapping.items():
+        if old_key in old_dict:
+            new_dict[new_key] = old_dict[old_key]
+    for key in old_dict:
+        if key not in key_mapping:
+            new_dict[key] = old_dict[key]
+    return new_dict
+
+
+def apply_restart_metadata(state: dict, tracer_properties: dict = None) -> dict:
+    """Return a state with units and dimension names applied from the variable
+    properties, since restart files do not store this metadata."""
+    properties_by_std_name = fortran_info.properties_by_std_name
+    if tracer_properties is not None:
+        properties_by_std_name = dict(properties_by_std_name, **tracer_properties)
+    new_state = {}
+    for name, da in state.items():
+        if name in properties_by_std_name:
+            properties = properties_by_std_name[name]
+            # assign_attrs and apply_dims both return new DataArray objects
+            # sharing the underlying data, so no copy of the data is needed
+            new_da = da.assign_attrs(units=properties["units"])
+            new_state[name] = apply_dims(new_da, properties["dims"])
+        else:
+            new_state[name] = da
+    return new_state
+
+
+def apply_dims(da: xr.DataArray, dims: List[str]) -> xr.DataArray:
+    """Rename the trailing dimensions of a DataArray to the given names.
+
+    Builds the renamed DataArray directly around the existing array rather
+    than going through xarray's rename machinery, which re-validates and
+    re-indexes the whole object per call. Coordinates are dropped in the
+    process, which is fine here since quantities never carry them.
+    """
+    if len(dims) < len(da.dims):
+        new_dims = da.dims[: len(da.dims) - len(dims)] + tuple(dims)
+    else:
+        new_dims = tuple(dims[: len(da.dims)])
+    return xr.DataArray(da.variable.data, dims=new_dims, attrs=da.attrs, name=da.name)
+
+
+def get_current_date_from_coupler_res(file: TextIO) -> cftime.datetime:
+    lines = file.readlines()
+    calendar_type = int(lines[0].split()[0])
+    # the current date is on the third line, after the calendar and start date
+    year, month, day, hour, minute, second = (
+        int(value) for value in lines[2].split()[:6]
+    )
+    return pace.util.FMS_TO_CFTIME_TYPE[calendar_type](
+        year, month, day, hour, minute, second
+    )
+
+
+def broadcast_state(
+    state: dict, communicator: pace.util.CubedSphereCommunicator
+) -> dict:
+    """Distribute a state loaded on the tile master rank to all ranks on
+    that tile, subsetting each quantity to the receiving rank's subtile."""
+    # resolve the tile communicator once; pace.util caches the underlying
+    # comm split on the communicator, so no Split/Free happens per open
+    tile = communicator.tile
+    tile_comm = tile.comm
+    partitioner = tile.partitioner
+    total_ranks = partitioner.total_ranks
+    # every rank sees the same communicator implementation, so this choice
+    # is consistent across the tile
+    use_ibcast = hasattr(tile_comm, "Ibcast")
+
+    def subtile_nbytes(metadata):
+        extent = partitioner.subtile_extent(metadata)
+        return int(np.prod(extent)) * np.dtype(metadata.dtype).itemsize
+
+    def unpack_subtile_buffer(name_list, metadata_list, buffer):
+        """Slice one rank's segment of the fused scatter buffer back into
+        per-variable quantities.
+
+        The returned arrays are zero-copy views reinterpreting the receive
+        buffer in place, which stays alive as their backing store; nothing
+        else references the buffer once this returns.
+        """
+        new_state = {}
+        offset = 0
+        for name, metadata in zip(name_list, metadata_list):
+            extent = partitioner.subtile_extent(metadata)
+            nbytes = subtile_nbytes(metadata)
+            data = (
+                buffer[offset : offset + nbytes]
+                .view(np.dtype(metadata.dtype))
+                .reshape(extent)
+            )
+            new_state[name] = pace.util.Quantity(
+                data, dims=metadata.dims, units=metadata.units
+            )
+            offset += nbytes
+        return new_state
+
+    def broadcast_master():
+        name_list = sorted(name for name in state if name != "time")
+        quantity_list = [state[name] for name in name_list]
+        metadata_list = [quantity.metadata for quantity in quantity_list]
+        # pack names, metadata and time into one serialized header so the
+        # control information moves in a single small broadcast instead of
+        # three separate pickled bcast round-trips
+        header = np.frombuffer(
+            pickle.dumps(
+                (name_list, metadata_list, state.get("time")),
+                protocol=pickle.HIGHEST_PROTOCOL,
+            ),
+            dtype=np.uint8,
+        ).copy()
+        header_size = np.array([header.size], dtype=np.int32)
+        if use_ibcast:
+            # initiate the header broadcasts non-blocking, so they travel
+            # while the send buffer below is being packed
+            header_requests = [
+                tile_comm.Ibcast(header_size, root=ROOT_RANK),
+                tile_comm.Ibcast([header, MPI.BYTE], root=ROOT_RANK),
+            ]
+        else:
+            tile_comm.Bcast(header_size, root=ROOT_RANK)
+            tile_comm.Bcast([header, MPI.BYTE], root=ROOT_RANK)
+            header_requests = []
+        # pack the subtile of every variable for every rank into one
+        # contiguous buffer, so the whole tile moves in a single collective
+        # instead of one latency-bound scatter per variable
+        bytes_per_rank = sum(subtile_nbytes(metadata) for metadata in metadata_list)
+        sendbuf = np.empty(total_ranks * bytes_per_rank, dtype=np.uint8)
+        offset = 0
+        for rank in range(total_ranks):
+            for quantity, metadata in zip(quantity_list, metadata_list):
+                subtile = partitioner.subtile_slice(
+                    rank,
+                    global_dims=metadata.dims,
+                    global_extent=metadata.extent,
+                    overlap=True,
+                )
+                nbytes = subtile_nbytes(metadata)
+                # view the destination segment with the variable's own dtype
+                # and shape, so the subtile is copied straight into the send
+                # buffer without an intermediate contiguous temporary
+                segment = (
+                    sendbuf[offset : offset + nbytes]
+                    .view(np.dtype(metadata.dtype))
+                    .reshape(partitioner.subtile_extent(metadata))
+                )
+                segment[...] = quantity.view[subtile]
+                offset += nbytes
+        recvbuf = np.empty(bytes_per_rank, dtype=np.uint8)
+        counts = [bytes_per_rank] * total_ranks
+        displs = [rank * bytes_per_rank for rank in range(total_ranks)]
+        if header_requests:
+            MPI.Request.Waitall(header_requests)
+        tile_comm.Scatterv([sendbuf, counts, displs, MPI.BYTE], recvbuf, root=ROOT_RANK)
+        new_state = unpack_subtile_buffer(name_list, metadata_list, recvbuf)
+        time = state.get("time")
+        if time is not None:
+            new_state["time"] = time
+        return new_state
+
+    def broadcast_client():
+        # non-blocking collectives only match other non-blocking collectives,
+        # so the client mirrors the master's choice even though it has no
+        # work of its own to overlap
+        header_size = np.empty(1, dtype=np.int32)
+        if use_ibcast:
+            tile_comm.Ibcast(header_size, root=ROOT_RANK).Wait()
+            header = np.empty(header_size[0], dtype=np.uint8)
+            tile_comm.Ibcast([header, MPI.BYTE], root=ROOT_RANK).Wait()
+        else:
+            tile_comm.Bcast(header_size, root=ROOT_RANK)
+            header = np.empty(header_size[0], dtype=np.uint8)
+            tile_comm.Bcast([header, MPI.BYTE], root=ROOT_RANK)
+        name_list, metadata_list, time = pickle.loads(header.tobytes())
+        bytes_per_rank = sum(subtile_nbytes(metadata) for metadata in metadata_list)
+        recvbuf = np.empty(bytes_per_rank, dtype=np.uint8)
+        tile_comm.Scatterv(None, recvbuf, root=ROOT_RANK)
+        new_state = unpack_subtile_buffer(name_list, metadata_list, recvbuf)
+        if time is not None:
+            new_state["time"] = time
+        return new_state
+
+    if communicator.tile.rank == ROOT_RANK:
+        return broadcast_master()
+    else:
+        return broadcast_client()
+
+
+def _get_fs(path: str) -> fsspec.spec.AbstractFileSystem:
+    fs, _, _ = fsspec.get_fs_token_paths(path)
+    return fs
+
+
+def _is_file(path: str) -> bool:
+    return _get_fs(path).isfile(path)
@@ -38,6 +38,7 @@ print(f"library_link_args: {library_link_args}")
 requirements = [
     "mpi4py>=3.0.3",
     "cftime>=1.2.1",
+    "fsspec",
     "xarray>=0.15.1",
     "netCDF4>=1.4.2",
     "numpy>=1.16",
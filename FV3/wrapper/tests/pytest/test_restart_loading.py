@@ -0,0 +1,198 @@
+import sys
+import unittest.mock
+
+import numpy as np
+import pytest
+import xarray as xr
+
+try:
+    from fv3gfs.wrapper._restart import fortran_info, legacy
+except ImportError:
+    # the restart loader does not need the compiled extension or MPI, so the
+    # tests here run without the built wrapper
+    sys.modules["fv3gfs.wrapper._wrapper"] = unittest.mock.MagicMock()
+    from fv3gfs.wrapper._restart import fortran_info, legacy
+
+NZ, NY, NX = 2, 3, 4
+
+
+def write_fv_core_file(path, extra_vars=None):
+    """Write a netCDF file shaped like one tile of fv_core.res, using the
+    variable names the Fortran model writes (T, W, phis, not pt, w)."""
+    data_vars = {
+        "T": (
+            ["Time", "zaxis_1", "yaxis_2", "xaxis_1"],
+            np.full((1, NZ, NY, NX), 300.0),
+        ),
+        "W": (["Time", "zaxis_1", "yaxis_2", "xaxis_1"], np.zeros((1, NZ, NY, NX)),),
+        "phis": (["Time", "yaxis_2", "xaxis_1"], np.ones((1, NY, NX))),
+    }
+    if extra_vars is not None:
+        data_vars.update(extra_vars)
+    coords = {
+        "Time": [1.0],
+        "zaxis_1": np.arange(1.0, NZ + 1),
+        "yaxis_2": np.arange(1.0, NY + 1),
+        "xaxis_1": np.arange(1.0, NX + 1),
+    }
+    xr.Dataset(data_vars, coords=coords).to_netcdf(path)
+
+
+def load_file(path, **kwargs):
+    with open(path, "rb") as file:
+        return legacy.load_partial_state_from_restart_file(file, **kwargs)
+
+
+def test_load_restart_file_maps_fortran_names(tmpdir):
+    filename = str(tmpdir.join("fv_core.res.tile1.nc"))
+    write_fv_core_file(filename)
+    state = load_file(filename)
+    assert set(state.keys()) == {
+        "air_temperature",
+        "vertical_wind",
+        "surface_geopotential",
+    }
+    quantity = state["air_temperature"]
+    assert quantity.dims == ("z", "y", "x")
+    assert quantity.units == "degK"
+    assert quantity.extent == (NZ, NY, NX)  # leading Time dimension dropped
+    np.testing.assert_array_equal(quantity.view[:], 300.0)
+
+
+def test_load_restart_file_maps_surface_names(tmpdir):
+    filename = str(tmpdir.join("sfc_data.tile1.nc"))
+    data_vars = {
+        name: (["Time", "yaxis_1", "xaxis_1"], np.ones((1, NY, NX)))
+        for name in ("tsea", "sheleg", "snwdph")
+    }
+    xr.Dataset(data_vars, coords={"Time": [1.0]}).to_netcdf(filename)
+    state = load_file(filename)
+    assert set(state.keys()) == {
+        "surface_temperature",
+        "water_equivalent_of_accumulated_snow_depth",
+        "snow_depth_water_equivalent",
+    }
+    assert state["surface_temperature"].dims == ("y", "x")
+
+
+def test_load_restart_file_maps_tracer_names(tmpdir):
+    filename = str(tmpdir.join("fv_tracer.res.tile1.nc"))
+    data_vars = {
+        "sphum": (["Time", "zaxis_1", "yaxis_1", "xaxis_1"], np.ones((1, NZ, NY, NX)))
+    }
+    xr.Dataset(data_vars).to_netcdf(filename)
+    tracer_properties = {
+        "specific_humidity": {
+            "fortran_name": "sphum",
+            "restart_name": "sphum",
+            "units": "g/kg",
+            "dims": ["z", "y", "x"],
+        }
+    }
+    state = load_file(filename, tracer_properties=tracer_properties)
+    assert set(state.keys()) == {"specific_humidity"}
+    assert state["specific_humidity"].units == "g/kg"
+
+
+def test_load_restart_file_only_names(tmpdir):
+    filename = str(tmpdir.join("fv_core.res.tile1.nc"))
+    write_fv_core_file(filename)
+    state = load_file(filename, only_names=["air_temperature"])
+    assert set(state.keys()) == {"air_temperature"}
+
+
+def test_load_restart_file_drops_unknown_variables(tmpdir):
+    filename = str(tmpdir.join("fv_core.res.tile1.nc"))
+    extra = {"mystery": (["Time", "yaxis_2", "xaxis_1"], np.ones((1, NY, NX)))}
+    write_fv_core_file(filename, extra_vars=extra)
+    # the h5py fast path falls back to the xarray reader for this file, which
+    # must drop the unknown variable rather than raise
+    state = load_file(filename)
+    assert "mystery" not in state
+    assert "air_temperature" in state
+
+
+@pytest.mark.skipif(not legacy._HAVE_H5PY, reason="h5py is not installed")
+def test_xarray_path_matches_h5py_path(tmpdir, monkeypatch):
+    filename = str(tmpdir.join("fv_core.res.tile1.nc"))
+    write_fv_core_file(filename)
+    h5py_state = load_file(filename)
+    monkeypatch.setattr(legacy, "_HAVE_H5PY", False)
+    xarray_state = load_file(filename)
+    assert set(h5py_state.keys()) == set(xarray_state.keys())
+    for name, quantity in h5py_state.items():
+        assert quantity.dims == xarray_state[name].dims
+        assert quantity.units == xarray_state[name].units
+        np.testing.assert_array_equal(quantity.view[:], xarray_state[name].view[:])
+
+
+def test_geo_coord_cache_reuses_coordinates(tmpdir, monkeypatch):
+    monkeypatch.setattr(legacy, "_geo_coord_cache", {})
+    filename = str(tmpdir.join("fv_core.res.tile1.nc"))
+    write_fv_core_file(filename)
+    with open(filename, "rb") as file:
+        first = legacy._open_restart_dataset(file).load()
+    assert len(legacy._geo_coord_cache) == 1
+    with open(filename, "rb") as file:
+        second = legacy._open_restart_dataset(file).load()
+    assert len(legacy._geo_coord_cache) == 1
+    xr.testing.assert_identical(first, second)
+
+
+def test_restart_filenames_includes_optional_files_only_if_present(tmpdir):
+    write_fv_core_file(str(tmpdir.join("sfc_data.tile1.nc")))
+    filenames = legacy.restart_filenames(str(tmpdir), tile_index=0)
+    basenames = [filename.split("/")[-1] for filename in filenames]
+    assert basenames == [
+        "fv_core.res.tile1.nc",
+        "fv_srf_wnd.res.tile1.nc",
+        "fv_tracer.res.tile1.nc",
+        "sfc_data.tile1.nc",
+    ]
+
+
+def test_restart_filenames_prepends_label(tmpdir):
+    filenames = legacy.restart_filenames(str(tmpdir), tile_index=2, label="RESTART")
+    basenames = [filename.split("/")[-1] for filename in filenames]
+    assert basenames == [
+        "RESTART.fv_core.res.tile3.nc",
+        "RESTART.fv_srf_wnd.res.tile3.nc",
+        "RESTART.fv_tracer.res.tile3.nc",
+    ]
+
+
+def test_map_keys():
+    old_dict = {"T": 1, "phis": 2, "unmapped": 3}
+    new_dict = legacy.map_keys({"T": "air_temperature", "absent": "ignored"}, old_dict)
+    assert new_dict == {"air_temperature": 1, "phis": 2, "unmapped": 3}
+
+
+def test_apply_dims_renames_trailing_dimensions():
+    da = xr.DataArray(
+        np.zeros((1, NY, NX)), dims=["Time", "yaxis_2", "xaxis_1"], attrs={"units": "m"}
+    )
+    renamed = legacy.apply_dims(da, ["y", "x"])
+    assert renamed.dims == ("Time", "y", "x")
+    assert renamed.attrs["units"] == "m"
+    assert renamed.variable.data is da.variable.data
+
+
+def test_radiation_flux_restart_names_map_to_total_sky_upward():
+    # several radiation-flux fields share a fortran_name and are distinguished
+    # only by fortran_subname; the restart files hold the upfxc (total-sky
+    # upward) component, so that is what these names must map to
+    names = fortran_info.get_restart_standard_names()
+    assert names["sfcfsw"] == "total_sky_upward_shortwave_flux_at_surface"
+    assert names["sfcflw"] == "total_sky_upward_longwave_flux_at_surface"
+    assert names["topfsw"] == "total_sky_upward_shortwave_flux_at_top_of_atmosphere"
+    assert names["topflw"] == "total_sky_upward_longwave_flux_at_top_of_atmosphere"
+
+
+def test_get_restart_standard_names_overlays_tracers():
+    names = fortran_info.get_restart_standard_names(
+        tracer_properties={
+            "specific_humidity": {"fortran_name": "sphum", "restart_name": "sphum"}
+        }
+    )
+    assert names["T"] == "air_temperature"
+    assert names["sphum"] == "specific_humidity"